@@ -38,7 +38,7 @@ const float CALIBRATION_FACTOR = -4.0; // Temperature calibration factor (Celsiu
 int previousTemperature = 0;
 unsigned int previousHumidity = 0;
 unsigned int previousPressure = 0;
-String previousColor = "";
+uint16_t previousColor[4] = {0, 0, 0, 0};
 int r, g, b, a;
 long previousMillis = 0; // last time readings were checked, in ms
 
@@ -54,9 +54,9 @@ BLEUnsignedIntCharacteristic pressureCharacteristic("2A6D",               // Uns
                                                     BLERead | BLENotify); // Remote clients can read and get updates
 
 BLECharacteristic colorCharacteristic("936b6a25-e503-4f7c-9349-bcc76c22b8c3", // Custom Characteristics
-                                      BLERead | BLENotify, 24);               // 1234,5678,
+                                      BLERead | BLENotify, 8, true);          // (4) raw uint16_t values
 
-BLEDescriptor colorLabelDescriptor("2901", "16-bit ints: r, g, b, a");
+BLEDescriptor colorLabelDescriptor("2901", "uint16[4], little endian: r, g, b, a");
 
 void setup() {
     Serial.begin(9600); // Initialize serial communication
@@ -104,7 +104,7 @@ void setup() {
     tempCharacteristic.setValue(0);     // Set initial temperature value
     humidCharacteristic.setValue(0);    // Set initial humidity value
     pressureCharacteristic.setValue(0); // Set initial pressure value
-    colorCharacteristic.setValue("");   // Set initial color value
+    colorCharacteristic.writeValue(previousColor, sizeof(previousColor)); // Set initial color value
 
     BLE.advertise(); // Start advertising
     Serial.print("Peripheral device MAC: ");
@@ -195,25 +195,17 @@ void updateReadings() {
     }
 
     // Get color reading everytime
-    // e.g. "12345,45678,89012,23456"
-    String stringColor = "";
-    stringColor += r;
-    stringColor += ",";
-    stringColor += g;
-    stringColor += ",";
-    stringColor += b;
-    stringColor += ",";
-    stringColor += a;
-
-    if (stringColor != previousColor) { // If reading has changed
-
-        byte bytes[stringColor.length() + 1];
-        stringColor.getBytes(bytes, stringColor.length() + 1);
+    // (4) raw little-endian uint16_t values, 8 bytes on the wire
+    uint16_t color[4] = {(uint16_t) r, (uint16_t) g, (uint16_t) b, (uint16_t) a};
 
+    if (memcmp(color, previousColor, sizeof(color)) != 0) { // If reading has changed
         Serial.print("r, g, b, a: ");
-        Serial.println(stringColor);
+        Serial.print(r); Serial.print(",");
+        Serial.print(g); Serial.print(",");
+        Serial.print(b); Serial.print(",");
+        Serial.println(a);
 
-        colorCharacteristic.writeValue(bytes, sizeof(bytes));
-        previousColor = stringColor;
+        colorCharacteristic.writeValue(color, sizeof(color));
+        memcpy(previousColor, color, sizeof(color));
     }
 }
@@ -1,9 +1,10 @@
+import struct
 import sys
 import time
 from argparse import ArgumentParser
 
+import numpy as np
 from bluepy import btle  # linux only (no mac)
-from colr import color as colr
 
 
 # BLE IoT Sensor Demo
@@ -12,136 +13,187 @@ from colr import color as colr
 # Requirements: python3 -m pip install --user -r requirements.txt
 # To Run: python3 ./rasppi_ble_receiver.py d1:aa:89:0c:ee:82 <- MAC address - change me!
 
+COLOR_CHAR_UUID = "936b6a25-e503-4f7c-9349-bcc76c22b8c3"
 
-def main():
-    # get args
-    args = get_args()
-
-    print("Connecting...")
-    nano_sense = btle.Peripheral(args.mac_address)
-
-    print("Discovering Services...")
-    _ = nano_sense.services
-    environmental_sensing_service = nano_sense.getServiceByUUID("181A")
-
-    print("Discovering Characteristics...")
-    _ = environmental_sensing_service.getCharacteristics()
-
-    while True:
-        print("\n")
-        read_temperature(environmental_sensing_service)
-        read_humidity(environmental_sensing_service)
-        read_pressure(environmental_sensing_service)
-        read_color(environmental_sensing_service)
-
-        # time.sleep(2) # transmission frequency set on IoT device
-
-
-def byte_array_to_int(value):
-    # Raw data is hexstring of int values, as a series of bytes, in little endian byte order
-    # values are converted from bytes -> bytearray -> int
-    # e.g., b'\xb8\x08\x00\x00' -> bytearray(b'\xb8\x08\x00\x00') -> 2232
-
-    # print(f"{sys._getframe().f_code.co_name}: {value}")
+arg_parser = ArgumentParser(description="BLE IoT Sensor Demo")
+arg_parser.add_argument('mac_address', help="MAC address of device to connect")
 
-    value = bytearray(value)
-    value = int.from_bytes(value, byteorder="little")
-    return value
+# ANSI 24-bit color escape codes (CSI 38/48;2;r;g;b = foreground/background)
+ANSI_RESET = "\x1b[0m"
 
+# render ANSI color swatches only on an interactive terminal; when stdout is
+# piped to a file or the journal the escape sequences are just log noise
+STDOUT_IS_TTY = sys.stdout.isatty()
 
-def split_color_str_to_array(value):
-    # e.g., b'2660,2059,1787,4097\x00' -> 2660,2059,1787,4097 ->
-    #       [2660, 2059, 1787, 4097] -> 166.0,128.0,111.0,255.0
+# CCCD value that asks the peripheral to push notifications
+NOTIFICATIONS_ON = b"\x01\x00"
 
-    # print(f"{sys._getframe().f_code.co_name}: {value}")
+# seconds of silence before reporting no data, paced on the monotonic clock
+NOTIFICATION_TIMEOUT = 5.0
 
-    # remove extra bit on end ('\x00')
-    value = value[0:-1]
+# seconds per waitForNotifications call; short so the timeout check stays responsive
+WAIT_QUANTUM = 1.0
 
-    # split r, g, b, a values into array of 16-bit ints
-    values = list(map(int, value.split(",")))
+# 12-bit (0-4097) -> 8-bit (0-255) color lookup table, built once at import;
+# each entry is (v * 255 + 2048) // 4097, i.e. scaled and rounded to nearest
+COLOR_LUT = tuple((v * 255 + 2048) // 4097 for v in range(4098))
 
-    # convert from 16-bit ints (2^16 or 0-65535) to 8-bit ints (2^8 or 0-255)
-    # values[:] = [int(v) % 256 for v in values]
+# struct-of-arrays ring buffers holding the most recent decoded readings for
+# downstream ingestion (MQTT, InfluxDB, file, ...); preallocated once so
+# recording a sample allocates nothing, and the oldest samples are
+# overwritten when a ring wraps
+RING_SIZE = 1024
+TEMPERATURE_LOG = np.empty(RING_SIZE, np.float32)
+HUMIDITY_LOG = np.empty(RING_SIZE, np.float32)
+PRESSURE_LOG = np.empty(RING_SIZE, np.float32)
+COLOR_LOG = np.empty((RING_SIZE, 4), np.uint8)
 
-    # actual sensor is reading values are from 0 - 4097
-    print(f"12-bit Color values (r,g,b,a): {values}")
+# samples recorded per stream; cursor into each ring is count % RING_SIZE
+sample_counts = {"temperature": 0, "humidity": 0, "pressure": 0, "color": 0}
 
-    values[:] = [round(int(v) / (4097 / 255), 0) for v in values]
 
-    return values
+def record_sample(log, name, value):
+    # O(1) in-place append, no per-sample object allocation
+    log[sample_counts[name] % RING_SIZE] = value
+    sample_counts[name] += 1
 
 
-def byte_array_to_char(value):
-    # e.g., b'2660,2058,1787,4097\x00' -> 2659,2058,1785,4097
-    value = value.decode("utf-8")
-    return value
+class SensorDelegate(btle.DefaultDelegate):
+    # dispatches notification data to the decoder registered for each handle
 
+    def __init__(self):
+        btle.DefaultDelegate.__init__(self)
+        self.handlers = {}
 
-def decimal_exponent_two(value):
-    # e.g., 2350 -> 23.5
-    return value / 100
+    def register(self, characteristic, handler):
+        self.handlers[characteristic.getHandle()] = handler
 
+    def handleNotification(self, cHandle, data):
+        handler = self.handlers.get(cHandle)
+        if handler is not None:
+            handler(data)
 
-def decimal_exponent_one(value):
-    # e.g., 988343 -> 98834.3
-    return value / 10
 
+def enable_notifications(peripheral, characteristic):
+    # write to the Client Characteristic Configuration Descriptor (0x2902)
+    cccd = characteristic.getDescriptors(forUUID=0x2902)[0]
+    peripheral.writeCharacteristic(cccd.handle, NOTIFICATIONS_ON, withResponse=True)
 
-def pascals_to_kilopascals(value):
-    # 1 Kilopascal (kPa) is equal to 1000 pascals (Pa)
-    # to convert kPa to pascal, multiply the kPa value by 1000
-    # 98834.3 -> 98.8343
-    return value / 1000
-
-
-def celsius_to_fahrenheit(value):
-    return (value * 1.8) + 32
-
-
-def read_color(service):
-    color_char = service.getCharacteristics("936b6a25-e503-4f7c-9349-bcc76c22b8c3")[0]
-    color = color_char.read()
-    color = byte_array_to_char(color)
-    color = split_color_str_to_array(color)
-    print(f" 8-bit Color values (r,g,b,a): {color[0]},{color[1]},{color[2]},{color[3]}")
-    print("RGB Color")
-    print(colr('\t\t', fore=(127, 127, 127), back=(color[0], color[1], color[2])))
-    print("Light Intensity")
-    print(colr('\t\t', fore=(127, 127, 127), back=(color[3], color[3], color[3])))
-
-
-def read_pressure(service):
-    pressure_char = service.getCharacteristics("2A6D")[0]
-    pressure = pressure_char.read()
-    pressure = byte_array_to_int(pressure)
-    pressure = decimal_exponent_one(pressure)
-    pressure = pascals_to_kilopascals(pressure)
-    print(f"Barometric Pressure: {round(pressure, 2)} kPa")
 
+def main():
+    # get args
+    args = arg_parser.parse_args()
 
-def read_humidity(service):
-    humidity_char = service.getCharacteristics("2A6F")[0]
-    humidity = humidity_char.read()
-    humidity = byte_array_to_int(humidity)
-    humidity = decimal_exponent_two(humidity)
-    print(f"Humidity: {round(humidity, 2)}%")
+    print("Connecting...")
+    nano_sense = btle.Peripheral(args.mac_address)
 
+    print("Discovering Services...")
+    environmental_sensing_service = nano_sense.getServiceByUUID("181A")
 
-def read_temperature(service):
-    temperature_char = service.getCharacteristics("2A6E")[0]
-    temperature = temperature_char.read()
-    temperature = byte_array_to_int(temperature)
-    temperature = decimal_exponent_two(temperature)
-    temperature = celsius_to_fahrenheit(temperature)
-    print(f"Temperature: {round(temperature, 2)}°F")
+    print("Discovering Characteristics...")
+    # resolve each characteristic once, instead of re-discovering by UUID on every poll
+    temperature_char = environmental_sensing_service.getCharacteristics("2A6E")[0]
+    humidity_char = environmental_sensing_service.getCharacteristics("2A6F")[0]
+    pressure_char = environmental_sensing_service.getCharacteristics("2A6D")[0]
+    color_char = environmental_sensing_service.getCharacteristics(COLOR_CHAR_UUID)[0]
+
+    delegate = SensorDelegate()
+    delegate.register(temperature_char, read_temperature)
+    delegate.register(humidity_char, read_humidity)
+    delegate.register(pressure_char, read_pressure)
+    delegate.register(color_char, read_color)
+    nano_sense.setDelegate(delegate)
+
+    # read each characteristic once so output starts immediately;
+    # the peripheral only notifies when a reading changes
+    print("\n")
+    read_temperature(temperature_char.read())
+    read_humidity(humidity_char.read())
+    read_pressure(pressure_char.read())
+    read_color(color_char.read())
+
+    print("Subscribing to Notifications...")
+    enable_notifications(nano_sense, temperature_char)
+    enable_notifications(nano_sense, humidity_char)
+    enable_notifications(nano_sense, pressure_char)
+    enable_notifications(nano_sense, color_char)
+
+    # the peripheral pushes updates as readings change (every 2 s at most),
+    # so there is no polling loop and no sleep; the no-data warning is paced
+    # by a monotonic deadline so its cadence never drifts with partial waits
+    # or wall-clock adjustments (NTP steps on a long-running Pi)
+    deadline = time.monotonic() + NOTIFICATION_TIMEOUT
+    while True:
+        if nano_sense.waitForNotifications(WAIT_QUANTUM):
+            deadline = time.monotonic() + NOTIFICATION_TIMEOUT
+        elif time.monotonic() >= deadline:
+            print("Waiting for notifications...")
+            deadline += NOTIFICATION_TIMEOUT
 
 
-def get_args():
-    arg_parser = ArgumentParser(description="BLE IoT Sensor Demo")
-    arg_parser.add_argument('mac_address', help="MAC address of device to connect")
-    args = arg_parser.parse_args()
-    return args
+def byte_array_to_int(value):
+    # Raw data is a series of bytes, in little endian byte order
+    # int.from_bytes decodes the raw bytes directly, no intermediate bytearray
+    # e.g., b'\xb8\x08\x00\x00' -> 2232
+    return int.from_bytes(value, byteorder="little")
+
+
+def color_swatch(r, g, b):
+    # two tab stops of background color, built as one ANSI escape string
+    return f"\x1b[38;2;127;127;127;48;2;{r};{g};{b}m\t\t{ANSI_RESET}"
+
+
+def read_color(value):
+    # Raw data is (4) unsigned 16-bit ints, packed little endian
+    # e.g., b'd\n\x0b\x08\xfb\x06\x01\x10' -> (2660, 2059, 1787, 4097) -> [166, 128, 111, 255]
+    values = struct.unpack("<4H", value)
+
+    # rescale from 0-4097 to 0-255 by table lookup, no arithmetic per value
+    color = [COLOR_LUT[v] for v in values]
+
+    # one write/flush for the whole block instead of a syscall per line
+    msg = (
+        f"12-bit Color values (r,g,b,a): {list(values)}\n"
+        f" 8-bit Color values (r,g,b,a): {color[0]},{color[1]},{color[2]},{color[3]}\n"
+    )
+    if STDOUT_IS_TTY:
+        msg += (
+            "RGB Color\n"
+            f"{color_swatch(color[0], color[1], color[2])}\n"
+            "Light Intensity\n"
+            f"{color_swatch(color[3], color[3], color[3])}\n"
+        )
+    record_sample(COLOR_LOG, "color", color)
+    sys.stdout.write(msg)
+    sys.stdout.flush()
+
+
+def read_pressure(value):
+    # raw value is pascals with decimal exponent -1;
+    # / 10 (to Pa) and / 1000 (to kPa) fuse into a single * 1e-4
+    # e.g., 988343 -> 98.8343 kPa
+    pressure = byte_array_to_int(value) * 1e-4
+    record_sample(PRESSURE_LOG, "pressure", pressure)
+    sys.stdout.write(f"Barometric Pressure: {pressure:.2f} kPa\n")
+    sys.stdout.flush()
+
+
+def read_humidity(value):
+    # raw value is percent with decimal exponent -2, e.g., 2350 -> 23.5%
+    humidity = byte_array_to_int(value) / 100
+    record_sample(HUMIDITY_LOG, "humidity", humidity)
+    sys.stdout.write(f"Humidity: {humidity:.2f}%\n")
+    sys.stdout.flush()
+
+
+def read_temperature(value):
+    # raw value is degrees Celsius with decimal exponent -2;
+    # / 100 and the * 1.8 + 32 Fahrenheit conversion fuse into one expression
+    # e.g., 2350 -> 23.5 C -> 74.3 F
+    temperature = byte_array_to_int(value) * 0.018 + 32.0
+    record_sample(TEMPERATURE_LOG, "temperature", temperature)
+    sys.stdout.write(f"Temperature: {temperature:.2f}°F\n")
+    sys.stdout.flush()
 
 
 if __name__ == "__main__":